@@ -7,29 +7,137 @@ Description: ETL pipeline to extract posts data from JSONPlaceholder API,
              transform it for MongoDB compatibility, and load into MongoDB collection.
 """
 
+import io
 import os
 import sys
 import json
+import hashlib
 import time
+import math
+import queue
+import atexit
 import logging
+import logging.handlers
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import Dict, List, Any, Optional
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Any, Optional, Tuple
 import requests
-from pymongo import MongoClient
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from pymongo import ASCENDING, IndexModel, MongoClient, ReplaceOne
 from pymongo.errors import ConnectionFailure, BulkWriteError
+from pymongo.write_concern import WriteConcern
+from bson import ObjectId
 from dotenv import load_dotenv
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('etl_connector.log'),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+# orjson is an optional, faster drop-in for the stdlib json module
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# ijson is optional; when present, response bodies are parsed incrementally
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Configure logging: callers only enqueue records, and a background listener
+# thread formats them and writes to the file and console handlers
+_log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+_log_handlers = [
+    logging.FileHandler('etl_connector.log'),
+    logging.StreamHandler(sys.stdout)
+]
+for _handler in _log_handlers:
+    _handler.setFormatter(_log_formatter)
+
+_log_queue = queue.SimpleQueue()
+_log_listener = logging.handlers.QueueListener(_log_queue, *_log_handlers, respect_handler_level=True)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+_queue_handler = logging.handlers.QueueHandler(_log_queue)
+_queue_handler.setFormatter(logging.Formatter('%(message)s'))
+logging.basicConfig(level=logging.INFO, handlers=[_queue_handler])
 logger = logging.getLogger(__name__)
 
+# Records requested per page from the API
+DEFAULT_PAGE_SIZE = 20
+
+# Upper bound on sequentially fetched pages when the API reports no total count
+MAX_PAGES = 1000
+
+# Load modes selectable via LOAD_MODE or the load_data mode argument
+LOAD_MODES = ('upsert', 'insert', 'append')
+
+# Write concerns selectable via ETL_WRITE_CONCERN; None keeps the server default
+WRITE_CONCERNS = {
+    'acknowledged': None,
+    'unjournaled': WriteConcern(w=1, j=False),
+    'unacknowledged': WriteConcern(w=0)
+}
+
+# ETL metadata that is identical for every record produced by this connector;
+# stored once per batch in the batches collection rather than on each record
+ETL_METADATA_DEFAULTS = {
+    'source': 'jsonplaceholder_api',
+    'version': '1.0'
+}
+
+# Version of the document layout produced by transform_record; bump it whenever
+# the output changes so SKIP_UNCHANGED rewrites documents stored by older versions
+TRANSFORM_VERSION = 1
+
+# Indexes created by earlier versions that no longer serve any query; ingestion
+# timestamps moved to the batches collection. Dropped only with DROP_LEGACY_INDEXES
+LEGACY_INDEXES = ('etl_metadata.ingestion_timestamp_1',)
+
+
+def _loads(data: bytes) -> Any:
+    """Decode a JSON payload, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_default(obj: Any) -> str:
+    """Serialize values the stdlib json module cannot, matching orjson's datetime format"""
+    if isinstance(obj, datetime):
+        if obj.tzinfo is None:
+            obj = obj.replace(tzinfo=timezone.utc)
+        return obj.isoformat()
+    return str(obj)
+
+
+def _dumps(obj: Any) -> str:
+    """Serialize an object to indented JSON, using orjson when it is installed"""
+    if orjson is not None:
+        # datetimes are serialized natively; default only sees other unsupported types
+        return orjson.dumps(obj, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_NAIVE_UTC).decode()
+    return json.dumps(obj, indent=2, default=_json_default)
+
+
+def _canonical_json(obj: Any) -> bytes:
+    """Encode an object as compact JSON with sorted keys, for hashing"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(obj, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode()
+
+
+def _chunked(iterable: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Yield successive lists of at most size items from an iterable"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
 class ETLConnector:
     """
     ETL Connector class for extracting data from JSONPlaceholder API
@@ -45,16 +153,50 @@ class ETLConnector:
         self.base_url = os.getenv('API_BASE_URL', 'https://jsonplaceholder.typicode.com')
         self.api_key = os.getenv('API_KEY')  # Not required for JSONPlaceholder
         self.rate_limit_delay = float(os.getenv('RATE_LIMIT_DELAY', '1.0'))
+        self.max_concurrency = int(os.getenv('MAX_CONCURRENCY', '10'))
+        
+        # Shared pacing state so concurrent page fetches respect the rate limit
+        self._rate_lock = threading.Lock()
+        self._next_request_time = 0.0
+        
+        # Records rejected by bulk writes in the current run, counted across write threads
+        self._write_error_lock = threading.Lock()
+        self._write_error_count = 0
         
         # MongoDB Configuration
         self.mongo_uri = os.getenv('MONGO_URI', 'mongodb://localhost:27017/')
+        self.mongo_compressors = os.getenv('MONGO_COMPRESSORS', '')
         self.database_name = os.getenv('MONGO_DATABASE', 'etl_database')
         self.collection_name = os.getenv('MONGO_COLLECTION', 'jsonplaceholder_posts_raw')
+        self.batches_collection_name = os.getenv('MONGO_BATCHES_COLLECTION', 'etl_batches')
+        self.state_collection_name = os.getenv('MONGO_STATE_COLLECTION', 'etl_state')
+        self.batch_size = int(os.getenv('BATCH_SIZE', '500'))
+        self.write_workers = int(os.getenv('WRITE_WORKERS', '4'))
+        self.load_mode = os.getenv('LOAD_MODE', 'upsert')
+        self.store_original_data = os.getenv('STORE_ORIGINAL_DATA', 'false').lower() == 'true'
+        self.skip_unchanged = os.getenv('SKIP_UNCHANGED', 'true').lower() == 'true'
+        self.incremental_extract = os.getenv('INCREMENTAL_EXTRACT', 'true').lower() == 'true'
+        self.drop_legacy_indexes = os.getenv('DROP_LEGACY_INDEXES', 'false').lower() == 'true'
+        
+        # Relaxed write concerns trade durability for throughput on replayable loads
+        write_concern_name = os.getenv('ETL_WRITE_CONCERN', 'acknowledged')
+        if write_concern_name not in WRITE_CONCERNS:
+            logger.warning(f"Unknown ETL_WRITE_CONCERN '{write_concern_name}', using 'acknowledged'")
+            write_concern_name = 'acknowledged'
+        self.write_concern = WRITE_CONCERNS[write_concern_name]
         
         # Initialize MongoDB client
         self.mongo_client = None
         self.database = None
         self.collection = None
+        self.batches_collection = None
+        self.state_collection = None
+        
+        # Batch started by transform_data/transform_record, recorded by the following load_data
+        self.current_batch = None
+        
+        # Index setup runs on the first successful connection only
+        self._indexes_ensured = False
         
         # Request session for connection pooling
         self.session = requests.Session()
@@ -63,6 +205,23 @@ class ETLConnector:
             'Content-Type': 'application/json'
         })
         
+        # Keep enough pooled connections for concurrent page fetches and let
+        # urllib3 retry transient failures, honouring Retry-After on 429s
+        retry = Retry(
+            total=5,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=['GET'],
+            respect_retry_after_header=True
+        )
+        adapter = HTTPAdapter(
+            pool_connections=32,
+            pool_maxsize=max(32, self.max_concurrency),
+            max_retries=retry
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
         # Add API key to headers if provided
         if self.api_key:
             self.session.headers.update({
@@ -77,17 +236,64 @@ class ETLConnector:
             bool: True if connection successful, False otherwise
         """
         try:
-            self.mongo_client = MongoClient(self.mongo_uri, serverSelectionTimeoutMS=5000)
+            # Wire compression shrinks the repetitive BSON sent by bulk writes; keyword
+            # options override the URI, so only pass compressors when explicitly set
+            client_options = {'serverSelectionTimeoutMS': 5000}
+            if self.mongo_compressors:
+                client_options['compressors'] = self.mongo_compressors
+            self.mongo_client = MongoClient(self.mongo_uri, **client_options)
             # Test the connection
             self.mongo_client.admin.command('ping')
             self.database = self.mongo_client[self.database_name]
-            self.collection = self.database[self.collection_name]
+            self.collection = self._get_collection(self.collection_name)
+            
+            self.batches_collection = self.database[self.batches_collection_name]
+            self.state_collection = self.database[self.state_collection_name]
+            
+            # Create indexes once per connector rather than on every load,
+            # always with an acknowledged write concern
+            if not self._indexes_ensured:
+                self._create_indexes(self.database[self.collection_name])
+                if self.drop_legacy_indexes:
+                    self._drop_legacy_indexes(self.database[self.collection_name])
+                self.batches_collection.create_index([("ingestion_timestamp", ASCENDING)])
+                self._indexes_ensured = True
+            
             logger.info(f"Successfully connected to MongoDB: {self.database_name}.{self.collection_name}")
             return True
         except ConnectionFailure as e:
             logger.error(f"Failed to connect to MongoDB: {e}")
             return False
     
+    def _get_collection(self, name: str, write_concern: Optional[WriteConcern] = None):
+        """
+        Get a collection handle using the configured write concern
+        
+        Args:
+            name (str): Collection name
+            write_concern (WriteConcern, optional): Override for the configured write concern
+            
+        Returns:
+            Collection: Collection handle
+        """
+        return self.database.get_collection(name, write_concern=write_concern or self.write_concern)
+    
+    def _create_indexes(self, collection):
+        """Create the indexes used by the pipeline on a collection in one command"""
+        collection.create_indexes([
+            IndexModel([("etl_metadata.batch_id", ASCENDING)]),
+            IndexModel([("post_id", ASCENDING)], unique=True),
+            IndexModel([("user_id", ASCENDING)])
+        ])
+    
+    def _drop_legacy_indexes(self, collection):
+        """Drop indexes left by earlier versions, which every write still has to maintain"""
+        existing = collection.index_information()
+        for name in LEGACY_INDEXES:
+            if name in existing:
+                collection.drop_index(name)
+                logger.info(f"Dropped legacy index {name} from {collection.name}")
+    
     def extract_data(self, endpoint: str, params: Optional[Dict] = None) -> List[Dict[str, Any]]:
         """
         Extract data from API endpoint
@@ -101,6 +307,11 @@ class ETLConnector:
         """
         url = f"{self.base_url}/{endpoint.lstrip('/')}"
         all_data = []
+        rate_limit_delay = self.rate_limit_delay
+        
+        # Build the query parameters once; only the page number changes per request
+        current_params = params.copy() if params else {}
+        current_params['_limit'] = DEFAULT_PAGE_SIZE
         
         try:
             logger.info(f"Extracting data from: {url}")
@@ -108,19 +319,12 @@ class ETLConnector:
             # Handle pagination if needed (JSONPlaceholder doesn't paginate, but this is a template)
             page = 1
             while True:
-                current_params = params.copy() if params else {}
-                current_params.update({'_page': page, '_limit': 20})
+                current_params['_page'] = page
                 
+                # Rate limiting (429) and transient errors are retried by the session adapter
                 response = self.session.get(url, params=current_params, timeout=30)
-                
-                # Handle rate limiting
-                if response.status_code == 429:
-                    logger.warning("Rate limit hit, waiting...")
-                    time.sleep(self.rate_limit_delay * 2)
-                    continue
-                
                 response.raise_for_status()
-                data = response.json()
+                data = _loads(response.content)
                 
                 # Break if no more data (for APIs that support pagination)
                 if not data or len(data) == 0:
@@ -133,7 +337,7 @@ class ETLConnector:
                     break
                 
                 page += 1
-                time.sleep(self.rate_limit_delay)
+                time.sleep(rate_limit_delay)
             
             logger.info(f"Successfully extracted {len(all_data)} records")
             return all_data
@@ -148,125 +352,746 @@ class ETLConnector:
             logger.error(f"Unexpected error during extraction: {e}")
             return []
     
-    def transform_data(self, raw_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _wait_for_rate_limit(self):
+        """Block until the next request slot is available under the rate limit"""
+        with self._rate_lock:
+            now = time.monotonic()
+            wait = self._next_request_time - now
+            self._next_request_time = max(now, self._next_request_time) + self.rate_limit_delay
+        
+        if wait > 0:
+            time.sleep(wait)
+    
+    def _fetch_page(self, url: str, params: Dict, stream: bool = False,
+                    etag: Optional[str] = None) -> requests.Response:
         """
-        Transform raw data for MongoDB compatibility
+        Fetch a single page under the shared rate limit
+        
+        Rate limiting (429) and transient server errors are retried with
+        backoff by the session's HTTPAdapter.
         
         Args:
-            raw_data (List[Dict]): Raw data from API
+            url (str): Full URL to request
+            params (dict): Query parameters for this page
+            stream (bool): Defer downloading the body until it is read
+            etag (str, optional): ETag from a previous run, sent as If-None-Match
             
         Returns:
-            List[Dict]: Transformed data
+            requests.Response: Successful (or 304 Not Modified) response
         """
-        transformed_data = []
-        current_timestamp = datetime.now(timezone.utc)
+        headers = {'If-None-Match': etag} if etag else None
         
-        for record in raw_data:
-            try:
-                # Create transformed record
-                transformed_record = {
-                    # Original data
-                    'original_data': record,
-                    
-                    # ETL metadata
-                    'etl_metadata': {
-                        'ingestion_timestamp': current_timestamp,
-                        'source': 'jsonplaceholder_api',
-                        'version': '1.0',
-                        'record_id': record.get('id'),
-                        'data_quality_score': self._calculate_data_quality(record)
-                    },
-                    
-                    # Flatten and clean important fields
-                    'post_id': record.get('id'),
-                    'user_id': record.get('userId'),
-                    'title': record.get('title', '').strip(),
-                    'body': record.get('body', '').strip(),
-                    'title_word_count': len(record.get('title', '').split()),
-                    'body_word_count': len(record.get('body', '').split()),
-                    'has_content': bool(record.get('title') or record.get('body')),
-                }
+        self._wait_for_rate_limit()
+        response = self.session.get(url, params=params, timeout=30, stream=stream, headers=headers)
+        response.raise_for_status()
+        return response
+    
+    def _iter_response_items(self, response: requests.Response) -> Iterator[Dict[str, Any]]:
+        """
+        Yield the records contained in a response body
+        
+        With ijson installed the JSON array is parsed incrementally from the
+        socket, so a page is never materialized as a whole.
+        
+        Args:
+            response (requests.Response): Response opened with stream=True
+            
+        Yields:
+            Dict: One record from the response
+        """
+        try:
+            if response.status_code == 304:
+                # Not modified since the previous run; nothing to re-process
+                return
+            
+            if ijson is not None:
+                # Let urllib3 undo any Content-Encoding before ijson reads the stream
+                response.raw.decode_content = True
+                stream = io.BufferedReader(response.raw)
                 
-                # Add derived fields
-                transformed_record['content_length'] = len(
-                    (transformed_record['title'] + ' ' + transformed_record['body']).strip()
-                )
+                # Peek at the first non-whitespace byte: arrays are streamed item
+                # by item, any other body is yielded as a single record
+                head = stream.peek().lstrip()
+                while not head:
+                    if not stream.read(len(stream.peek())):
+                        return
+                    head = stream.peek().lstrip()
                 
-                transformed_data.append(transformed_record)
+                prefix = 'item' if head.startswith(b'[') else ''
+                yield from ijson.items(stream, prefix, use_float=True)
+            else:
+                data = _loads(response.content)
+                yield from (data if isinstance(data, list) else [data])
+        finally:
+            response.close()
+    
+    def iter_records(self, endpoint: str, params: Optional[Dict] = None,
+                     page_size: int = DEFAULT_PAGE_SIZE,
+                     etags: Optional[Dict[str, str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream records from API endpoint one at a time
+        
+        The first page is fetched to read the total record count from the
+        X-Total-Count header; the remaining pages are then requested through
+        a bounded thread pool, one window of MAX_CONCURRENCY pages at a time,
+        so only that window is ever held open.
+        
+        When etags is given, those remaining pages are requested conditionally
+        with the ETag seen on the previous run. Pages the API reports as not
+        modified are skipped, and etags is updated in place with the ETags
+        returned by this run.
+        
+        Args:
+            endpoint (str): API endpoint to call
+            params (dict, optional): Query parameters
+            page_size (int): Number of records requested per page
+            etags (dict, optional): Page number to ETag mapping from the previous run
+            
+        Yields:
+            Dict: One extracted record
+        """
+        url = f"{self.base_url}/{endpoint.lstrip('/')}"
+        base_params = params.copy() if params else {}
+        base_params['_limit'] = page_size
+        
+        logger.info(f"Extracting data from: {url} (max {self.max_concurrency} concurrent requests)")
+        
+        # Probe the first page to discover how many pages exist
+        response = self._fetch_page(url, {**base_params, '_page': 1}, stream=True)
+        total_count = response.headers.get('X-Total-Count')
+        
+        if total_count is None:
+            # API does not report a total; page sequentially until a page that is not
+            # exactly page_size long, which also stops on APIs that ignore _limit
+            page = 1
+            previous_first = None
+            while True:
+                items = self._iter_response_items(response)
+                first = next(items, None)
                 
-            except Exception as e:
-                logger.warning(f"Failed to transform record {record}: {e}")
-                continue
+                # An API that ignores _page returns the same page again
+                if page > 1 and first is not None and first == previous_first:
+                    items.close()
+                    logger.warning(f"Page {page} repeats page {page - 1}, stopping pagination")
+                    return
+                
+                page_count = 0
+                if first is not None:
+                    page_count = 1
+                    yield first
+                for record in items:
+                    page_count += 1
+                    yield record
+                
+                if page_count != page_size:
+                    return
+                
+                if page >= MAX_PAGES:
+                    logger.warning(f"Stopping pagination after {MAX_PAGES} pages")
+                    return
+                
+                previous_first = first
+                page += 1
+                response = self._fetch_page(url, {**base_params, '_page': page}, stream=True)
+        
+        yield from self._iter_response_items(response)
+        
+        total_pages = math.ceil(int(total_count) / page_size)
+        remaining = range(2, total_pages + 1)
+        
+        def fetch(page: int) -> requests.Response:
+            etag = etags.get(str(page)) if etags is not None else None
+            return self._fetch_page(url, {**base_params, '_page': page}, stream=True, etag=etag)
+        
+        unchanged_pages = 0
+        
+        if remaining:
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+                for start in range(0, len(remaining), self.max_concurrency):
+                    window = remaining[start:start + self.max_concurrency]
+                    # map preserves page order within the window
+                    responses = list(executor.map(fetch, window))
+                    for page, page_response in zip(window, responses):
+                        if etags is not None:
+                            if page_response.status_code == 304:
+                                unchanged_pages += 1
+                            elif page_response.headers.get('ETag'):
+                                etags[str(page)] = page_response.headers['ETag']
+                        yield from self._iter_response_items(page_response)
+        
+        if unchanged_pages:
+            logger.info(f"Skipped {unchanged_pages} pages not modified since the previous run")
+    
+    def extract_data_parallel(self, endpoint: str, params: Optional[Dict] = None,
+                              page_size: int = DEFAULT_PAGE_SIZE) -> List[Dict[str, Any]]:
+        """
+        Extract all pages from API endpoint using concurrent requests
+        
+        Args:
+            endpoint (str): API endpoint to call
+            params (dict, optional): Query parameters
+            page_size (int): Number of records requested per page
+            
+        Returns:
+            List[Dict]: Extracted data or empty list on failure
+        """
+        try:
+            all_data = list(self.iter_records(endpoint, params, page_size))
+            logger.info(f"Successfully extracted {len(all_data)} records")
+            return all_data
+            
+        except requests.exceptions.RequestException as e:
+            logger.error(f"API request failed: {e}")
+            return []
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to decode JSON response: {e}")
+            return []
+        except Exception as e:
+            logger.error(f"Unexpected error during extraction: {e}")
+            return []
+    
+    def _state_id(self, endpoint: str) -> str:
+        """Build the state document key for an endpoint and the collection it is loaded into"""
+        return (f"{self.base_url}/{endpoint.lstrip('/')}?_limit={DEFAULT_PAGE_SIZE}"
+                f"|{self.database_name}.{self.collection_name}")
+    
+    def _collection_state(self) -> Dict[str, Any]:
+        """
+        Summarize the target collection so stored ETags can be matched against it
+        
+        Returns:
+            Dict: Estimated record count and newest batch_id of the collection
+        """
+        latest = self.collection.find_one(
+            {}, {'_id': 0, 'etl_metadata.batch_id': 1},
+            sort=[('etl_metadata.batch_id', -1)]
+        )
+        return {
+            # Read from collection metadata, so this does not scan the collection
+            'record_count': self.collection.estimated_document_count(),
+            'latest_batch_id': latest.get('etl_metadata', {}).get('batch_id') if latest else None
+        }
+    
+    def _transform_state(self) -> Dict[str, Any]:
+        """Describe the settings that shape stored documents, which stored ETags must match"""
+        return {'version': TRANSFORM_VERSION, 'store_original_data': self.store_original_data}
+    
+    def _load_etags(self, endpoint: str) -> Dict[str, str]:
+        """
+        Load the page ETags stored by the previous successful run
+        
+        The ETags are ignored when the target collection is empty or no longer
+        matches the state recorded with them (for example after it was
+        dropped, truncated or restored), or when TRANSFORM_VERSION or
+        STORE_ORIGINAL_DATA changed, so every page is fetched and transformed
+        again.
+        
+        Args:
+            endpoint (str): API endpoint the ETags belong to
+            
+        Returns:
+            Dict[str, str]: Page number to ETag mapping
+        """
+        state = self.state_collection.find_one({'_id': self._state_id(endpoint)})
+        if not state:
+            return {}
+        
+        if state.get('transform_state') != self._transform_state():
+            logger.info("Transform settings changed since the stored ETags, fetching every page")
+            return {}
+        
+        collection_state = self._collection_state()
+        if not collection_state['record_count'] or state.get('collection_state') != collection_state:
+            logger.info("Stored ETags do not match the target collection, fetching every page")
+            return {}
+        
+        return dict(state.get('etags', {}))
+    
+    def _save_etags(self, endpoint: str, etags: Dict[str, str]):
+        """
+        Store page ETags for the next run's conditional requests
+        
+        Args:
+            endpoint (str): API endpoint the ETags belong to
+            etags (Dict[str, str]): Page number to ETag mapping
+        """
+        self.state_collection.update_one(
+            {'_id': self._state_id(endpoint)},
+            {'$set': {
+                'etags': etags,
+                'collection_state': self._collection_state(),
+                'transform_state': self._transform_state(),
+                'updated_at': datetime.now(timezone.utc)
+            }},
+            upsert=True
+        )
+    
+    def _new_batch(self) -> Dict[str, Any]:
+        """
+        Start a new ingestion batch
+        
+        Returns:
+            Dict: Batch document holding the metadata shared by its records
+        """
+        return {
+            '_id': ObjectId(),
+            'ingestion_timestamp': datetime.now(timezone.utc),
+            **ETL_METADATA_DEFAULTS
+        }
+    
+    def _start_batch(self, batch: Dict[str, Any]):
+        """
+        Store a batch in the batches collection before any of its records are written
+        
+        Records written by a run that later fails still reference an existing
+        batch; its record_count stays None until _record_batch completes it.
+        
+        Args:
+            batch (Dict): Batch document from _new_batch
+        """
+        self.batches_collection.replace_one(
+            {'_id': batch['_id']}, {**batch, 'record_count': None}, upsert=True
+        )
+    
+    def _record_batch(self, batch: Dict[str, Any], collection, inserted_count: int, updated_count: int):
+        """
+        Complete a batch started by _start_batch with its record count
+        
+        Only records actually written reference the batch, so skipped
+        records are not counted. Unacknowledged writes confirm nothing and
+        leave record_count as None.
+        
+        Args:
+            batch (Dict): Batch document from _new_batch
+            collection: Collection the batch was written to
+            inserted_count (int): Number of records inserted in the batch
+            updated_count (int): Number of records updated in the batch
+        """
+        record_count = inserted_count + updated_count if collection.write_concern.acknowledged else None
+        self.batches_collection.update_one({'_id': batch['_id']}, {'$set': {'record_count': record_count}})
+    
+    def _metadata_template(self, batch: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Build the ETL metadata fields shared by every record in a batch
+        
+        Args:
+            batch (Dict): Batch document from _new_batch
+            
+        Returns:
+            Dict: Metadata template to extend per record
+        """
+        return {'batch_id': batch['_id']}
+    
+    def transform_record(self, record: Dict[str, Any],
+                         metadata_template: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Transform a single raw record for MongoDB compatibility
+        
+        Args:
+            record (Dict): Raw record from API
+            metadata_template (Dict, optional): Shared batch metadata from _metadata_template;
+                defaults to the connector's current batch
+            
+        Returns:
+            Dict: Transformed record, or None if the record could not be transformed
+        """
+        if metadata_template is None:
+            # Share one batch (and one clock read) across standalone calls
+            if self.current_batch is None:
+                self.current_batch = self._new_batch()
+            metadata_template = self._metadata_template(self.current_batch)
+        
+        # Validate the shape up front so well-formed records need no exception handling
+        if not isinstance(record, dict):
+            logger.warning("Failed to transform record %r: expected an object", record)
+            return None
+        
+        # Read each source field once and reuse the cleaned values
+        get = record.get
+        record_id = get('id')
+        user_id = get('userId')
+        raw_title = get('title') or ''
+        raw_body = get('body') or ''
+        
+        if not isinstance(raw_title, str) or not isinstance(raw_body, str):
+            logger.warning("Failed to transform record %r: title and body must be strings", record)
+            return None
+        
+        title = raw_title.strip()
+        body = raw_body.strip()
+        
+        # Hash the raw record together with everything that shapes the stored
+        # document, so any source or output change is detected as a change
+        content_hash = hashlib.blake2b(
+            f"{TRANSFORM_VERSION}:{int(self.store_original_data)}:".encode() + _canonical_json(record),
+            digest_size=16
+        ).hexdigest()
+        
+        transformed_record = {
+            # ETL metadata (quality score: 0.25 per populated required field)
+            'etl_metadata': {
+                **metadata_template,
+                'record_id': record_id,
+                'content_hash': content_hash,
+                'data_quality_score': 0.25 * (bool(record_id) + bool(user_id) + bool(title) + bool(body))
+            },
+            
+            # Flatten and clean important fields
+            'post_id': record_id,
+            'user_id': user_id,
+            'title': title,
+            'body': body,
+            'title_word_count': len(title.split()),
+            'body_word_count': len(body.split()),
+            'has_content': bool(raw_title or raw_body),
+            
+            # Derived fields (length of "title body" without building the string)
+            'content_length': len(title) + len(body) + (1 if title and body else 0),
+        }
+        
+        # The flattened fields already carry the source values, so the raw
+        # record is only duplicated into the document when explicitly requested
+        if self.store_original_data:
+            transformed_record['original_data'] = record
+        
+        return transformed_record
+    
+    def _transform_batch(self, records: Iterable[Dict[str, Any]],
+                         metadata_template: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Transform a batch of raw records, dropping those that fail validation
+        
+        Args:
+            records (Iterable[Dict]): Raw records from API
+            metadata_template (Dict): Shared batch metadata from _metadata_template
+            
+        Returns:
+            List[Dict]: Transformed records
+        """
+        # Filter a generator rather than a full intermediate list, so each
+        # transformed record is only referenced by the returned batch
+        transform_record = self.transform_record
+        transformed = (transform_record(record, metadata_template) for record in records)
+        return [record for record in transformed if record is not None]
+    
+    def transform_data(self, raw_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Transform raw data for MongoDB compatibility
+        
+        Args:
+            raw_data (List[Dict]): Raw data from API
+            
+        Returns:
+            List[Dict]: Transformed data
+        """
+        self.current_batch = self._new_batch()
+        metadata_template = self._metadata_template(self.current_batch)
+        transformed_data = self._transform_batch(raw_data, metadata_template)
         
         logger.info(f"Successfully transformed {len(transformed_data)} records")
         return transformed_data
     
-    def _calculate_data_quality(self, record: Dict[str, Any]) -> float:
+    def _bulk_upsert(self, chunk: List[Dict[str, Any]]) -> Tuple[int, int]:
+        """
+        Upsert one batch of transformed records with a single bulk_write
+        
+        Args:
+            chunk (List[Dict]): Transformed records to write
+            
+        Returns:
+            Tuple[int, int]: Inserted and updated record counts
+        """
+        if not chunk:
+            return 0, 0
+        
+        operations = [
+            ReplaceOne({'post_id': record['post_id']}, record, upsert=True)
+            for record in chunk
+        ]
+        
+        # The server rejects bypass_document_validation on unacknowledged writes
+        acknowledged = self.collection.write_concern.acknowledged
+        
+        try:
+            result = self.collection.bulk_write(
+                operations, ordered=False, bypass_document_validation=acknowledged
+            )
+            if not result.acknowledged:
+                # Unacknowledged writes report no counts
+                return 0, 0
+            return result.upserted_count, result.modified_count
+            
+        except BulkWriteError as e:
+            # Unordered writes continue past failures; keep the partial counts
+            details = e.details
+            self._count_write_errors(details)
+            for error in details.get('writeErrors', []):
+                failed_record = chunk[error['index']]
+                logger.warning("Failed to process record %s: %s", failed_record.get('post_id', 'unknown'), error.get('errmsg'))
+            return details.get('nUpserted', 0), details.get('nModified', 0)
+    
+    def _count_write_errors(self, details: Dict[str, Any]):
+        """Add the failures reported by a BulkWriteError to the current run's error count"""
+        failures = len(details.get('writeErrors', [])) + len(details.get('writeConcernErrors', []))
+        with self._write_error_lock:
+            self._write_error_count += failures
+    
+    def _bulk_insert(self, collection, chunk: List[Dict[str, Any]]) -> int:
+        """
+        Insert one batch of transformed records with a single insert_many
+        
+        Args:
+            collection: Collection to insert into
+            chunk (List[Dict]): Transformed records to write
+            
+        Returns:
+            int: Inserted record count
+        """
+        if not chunk:
+            return 0
+        
+        acknowledged = collection.write_concern.acknowledged
+        
+        try:
+            result = collection.insert_many(
+                chunk, ordered=False, bypass_document_validation=acknowledged
+            )
+            if not result.acknowledged:
+                # inserted_ids are generated client-side; the server confirmed nothing
+                return 0
+            return len(result.inserted_ids)
+            
+        except BulkWriteError as e:
+            # Unordered inserts continue past failures; keep the partial count
+            details = e.details
+            self._count_write_errors(details)
+            for error in details.get('writeErrors', []):
+                failed_record = chunk[error['index']]
+                logger.warning("Failed to process record %s: %s", failed_record.get('post_id', 'unknown'), error.get('errmsg'))
+            return details.get('nInserted', 0)
+    
+    def _prepare_staging(self):
+        """
+        Create an empty, indexed staging collection for a full reload
+        
+        Unacknowledged writes are not used for staging because the swap must
+        not happen before every insert has been applied.
+        
+        Returns:
+            Collection: The staging collection
+        """
+        write_concern = self.write_concern
+        if write_concern is not None and not write_concern.acknowledged:
+            write_concern = WRITE_CONCERNS['unjournaled']
+        
+        staging = self._get_collection(f"{self.collection_name}_staging", write_concern)
+        staging.drop()
+        self._create_indexes(staging)
+        return staging
+    
+    def _swap_staging(self, staging) -> bool:
+        """
+        Atomically replace the target collection with the loaded staging collection
+        
+        A staging collection with rejected inserts is incomplete, so it is
+        dropped instead and the existing collection is kept.
+        
+        Args:
+            staging (Collection): The loaded staging collection
+            
+        Returns:
+            bool: True if the target collection was replaced
+        """
+        if self._write_error_count:
+            staging.drop()
+            logger.error(f"Full reload had {self._write_error_count} write errors, "
+                         f"keeping the existing {self.database_name}.{self.collection_name}")
+            return False
+        
+        staging.rename(self.collection_name, dropTarget=True)
+        self.collection = self._get_collection(self.collection_name)
+        logger.info(f"Replaced {self.database_name}.{self.collection_name} with staging collection")
+        return True
+    
+    def _write_chunk(self, chunk: List[Dict[str, Any]], insert_into=None) -> Tuple[int, int]:
         """
-        Calculate a simple data quality score (0-1)
+        Write one batch, inserting into a collection if given, else upserting
         
         Args:
-            record (Dict): Data record
+            chunk (List[Dict]): Transformed records to write
+            insert_into (Collection, optional): Collection to plain-insert into
             
         Returns:
-            float: Quality score
+            Tuple[int, int]: Inserted and updated record counts
+        """
+        if insert_into is not None:
+            return self._bulk_insert(insert_into, chunk), 0
+        return self._bulk_upsert(chunk)
+    
+    def _skip_existing(self, chunks: Iterable[List[Dict[str, Any]]]) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Drop records whose post_id is already stored, for append-only loads
+        
+        The existing post_ids are fetched once with a single distinct call, so
+        only genuinely new records are sent to MongoDB.
+        
+        Args:
+            chunks (Iterable[List[Dict]]): Batches of transformed records
+            
+        Yields:
+            List[Dict]: Batches containing only new records
         """
-        score = 0.0
-        total_checks = 4
+        seen = set(self.collection.distinct('post_id'))
+        skipped = 0
         
-        # Check for required fields
-        if record.get('id'):
-            score += 0.25
-        if record.get('userId'):
-            score += 0.25
-        if record.get('title') and len(record['title'].strip()) > 0:
-            score += 0.25
-        if record.get('body') and len(record['body'].strip()) > 0:
-            score += 0.25
+        for chunk in chunks:
+            new_records = []
+            for record in chunk:
+                post_id = record['post_id']
+                if post_id in seen:
+                    skipped += 1
+                    continue
+                seen.add(post_id)
+                new_records.append(record)
+            yield new_records
         
-        return score
+        logger.info(f"Skipped {skipped} records already present in the collection")
     
-    def load_data(self, transformed_data: List[Dict[str, Any]]) -> bool:
+    def _skip_unchanged(self, chunks: Iterable[List[Dict[str, Any]]]) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Drop records whose stored content hash matches, for upsert loads
+        
+        The stored post_id/content_hash pairs are fetched once with a single
+        projected query, so unchanged records are never rewritten.
+        
+        Args:
+            chunks (Iterable[List[Dict]]): Batches of transformed records
+            
+        Yields:
+            List[Dict]: Batches containing only new or changed records
+        """
+        stored = {
+            document.get('post_id'): document.get('etl_metadata', {}).get('content_hash')
+            for document in self.collection.find(
+                {}, {'_id': 0, 'post_id': 1, 'etl_metadata.content_hash': 1}
+            )
+        }
+        skipped = 0
+        
+        stored_hash = stored.get
+        
+        for chunk in chunks:
+            changed_records = [
+                record for record in chunk
+                if stored_hash(record['post_id']) != record['etl_metadata']['content_hash']
+            ]
+            skipped += len(chunk) - len(changed_records)
+            yield changed_records
+        
+        logger.info(f"Skipped {skipped} unchanged records")
+    
+    def _write_chunks(self, chunks: Iterable[List[Dict[str, Any]]], insert_into=None) -> Tuple[int, int]:
+        """
+        Write batches concurrently on up to WRITE_WORKERS threads
+        
+        MongoClient is thread-safe and pools its connections, so several
+        bulk writes can be in flight at once. At most WRITE_WORKERS batches
+        are pending at any time, which keeps memory bounded when chunks are
+        produced lazily.
+        
+        Args:
+            chunks (Iterable[List[Dict]]): Batches of transformed records
+            insert_into (Collection, optional): Collection to plain-insert into
+            
+        Returns:
+            Tuple[int, int]: Inserted and updated record counts
+        """
+        inserted_count = 0
+        updated_count = 0
+        pending = deque()
+        
+        with ThreadPoolExecutor(max_workers=self.write_workers) as executor:
+            for chunk in chunks:
+                pending.append(executor.submit(self._write_chunk, chunk, insert_into))
+                
+                if len(pending) >= self.write_workers:
+                    inserted, updated = pending.popleft().result()
+                    inserted_count += inserted
+                    updated_count += updated
+            
+            while pending:
+                inserted, updated = pending.popleft().result()
+                inserted_count += inserted
+                updated_count += updated
+        
+        return inserted_count, updated_count
+    
+    def _load_chunks(self, chunks: Iterable[List[Dict[str, Any]]], mode: str,
+                     staging=None) -> Tuple[int, int]:
+        """
+        Write batches using the strategy for a load mode
+        
+        Args:
+            chunks (Iterable[List[Dict]]): Batches of transformed records
+            mode (str): 'upsert', 'insert' or 'append'
+            staging (Collection, optional): Staging collection for 'insert' mode
+            
+        Returns:
+            Tuple[int, int]: Inserted and updated record counts
+        """
+        if mode == 'append':
+            return self._write_chunks(self._skip_existing(chunks), self.collection)
+        
+        if mode == 'upsert' and self.skip_unchanged:
+            chunks = self._skip_unchanged(chunks)
+        
+        # Each chunk is a single round trip; several chunks are written concurrently
+        return self._write_chunks(chunks, staging)
+    
+    def load_data(self, transformed_data: List[Dict[str, Any]], mode: str = 'upsert') -> bool:
         """
         Load transformed data into MongoDB
         
+        In 'upsert' mode records are merged into the existing collection by
+        post_id. In 'insert' mode the data is treated as a full reload: it is
+        written with plain inserts into an empty staging collection, which
+        then replaces the target collection. In 'append' mode records whose
+        post_id is already stored are skipped and only new ones are inserted.
+        
         Args:
             transformed_data (List[Dict]): Transformed data to load
+            mode (str): 'upsert' (default), 'insert' or 'append'
             
         Returns:
             bool: True if load successful, False otherwise
         """
+        if mode not in LOAD_MODES:
+            logger.error(f"Unknown load mode: {mode}")
+            return False
+        
         if not transformed_data:
             logger.warning("No data to load")
             return True
         
         try:
-            # Create indexes for better query performance
-            self.collection.create_index("etl_metadata.ingestion_timestamp")
-            self.collection.create_index("post_id", unique=True)
-            self.collection.create_index("user_id")
-            
-            # Use direct insert/update operations instead of bulk_write
-            inserted_count = 0
-            updated_count = 0
-            
-            for record in transformed_data:
-                try:
-                    # Try to update existing record, insert if not found
-                    result = self.collection.replace_one(
-                        {'post_id': record['post_id']},
-                        record,
-                        upsert=True
-                    )
-                    
-                    if result.upserted_id:
-                        inserted_count += 1
-                    elif result.modified_count > 0:
-                        updated_count += 1
-                        
-                except Exception as e:
-                    logger.warning(f"Failed to process record {record.get('post_id', 'unknown')}: {e}")
-                    continue
+            self._write_error_count = 0
+            staging = self._prepare_staging() if mode == 'insert' else None
+            
+            if self.current_batch is not None:
+                self._start_batch(self.current_batch)
+            
+            inserted_count, updated_count = self._load_chunks(
+                _chunked(transformed_data, self.batch_size), mode, staging
+            )
+            
+            target = staging if staging is not None else self.collection
+            
+            if staging is not None and not self._swap_staging(staging):
+                return False
+            
+            if self.current_batch is not None:
+                self._record_batch(self.current_batch, target, inserted_count, updated_count)
+                self.current_batch = None
             
             logger.info(f"Data load completed: {inserted_count} inserted, {updated_count} updated")
             return True
@@ -279,6 +1104,10 @@ class ETLConnector:
         """
         Execute the complete ETL pipeline
         
+        Records are streamed from the API, transformed and written in
+        batches of BATCH_SIZE, so memory use is bounded by the batch size
+        rather than the size of the extract.
+        
         Returns:
             bool: True if pipeline completed successfully
         """
@@ -287,26 +1116,79 @@ class ETLConnector:
         
         try:
             # Step 1: Connect to MongoDB
+            if self.load_mode not in LOAD_MODES:
+                logger.error(f"Unknown load mode: {self.load_mode}")
+                return False
+            
             if not self.connect_to_mongodb():
                 return False
             
-            # Step 2: Extract data
-            raw_data = self.extract_data('posts')
-            if not raw_data:
+            # Full reloads are written to a staging collection and swapped in at the end
+            staging = self._prepare_staging() if self.load_mode == 'insert' else None
+            
+            # Merging loads can skip pages unchanged since the last run; full reloads need every page
+            etags = None
+            if self.incremental_extract and self.load_mode != 'insert':
+                etags = self._load_etags('posts')
+            
+            # Steps 2-4: Extract, transform and load one batch at a time
+            self._write_error_count = 0
+            batch = self._new_batch()
+            self._start_batch(batch)
+            metadata_template = self._metadata_template(batch)
+            extracted_count = 0
+            transformed_count = 0
+            
+            def transformed_chunks():
+                nonlocal extracted_count, transformed_count
+                for raw_chunk in _chunked(self.iter_records('posts', etags=etags), self.batch_size):
+                    extracted_count += len(raw_chunk)
+                    chunk = self._transform_batch(raw_chunk, metadata_template)
+                    transformed_count += len(chunk)
+                    yield chunk
+            
+            try:
+                # Writes run on worker threads while the next batch is extracted
+                inserted_count, updated_count = self._load_chunks(
+                    transformed_chunks(), self.load_mode, staging
+                )
+                
+            except requests.exceptions.RequestException as e:
+                logger.error(f"API request failed: {e}")
+                return False
+            except json.JSONDecodeError as e:
+                logger.error(f"Failed to decode JSON response: {e}")
+                return False
+            
+            logger.info(f"Successfully extracted {extracted_count} records")
+            if not extracted_count:
                 logger.error("No data extracted, stopping pipeline")
                 return False
             
-            # Step 3: Transform data
-            transformed_data = self.transform_data(raw_data)
-            if not transformed_data:
+            logger.info(f"Successfully transformed {transformed_count} records")
+            if not transformed_count:
                 logger.error("No data transformed, stopping pipeline")
                 return False
             
-            # Step 4: Load data
-            if not self.load_data(transformed_data):
-                logger.error("Data load failed, stopping pipeline")
+            target = staging if staging is not None else self.collection
+            
+            if staging is not None and not self._swap_staging(staging):
                 return False
             
+            self._record_batch(batch, target, inserted_count, updated_count)
+            
+            # Only remember ETags once the pages they describe are safely loaded;
+            # otherwise the next run would skip pages whose records never arrived
+            if etags is not None:
+                if self._write_error_count:
+                    logger.warning(f"Not saving ETags: {self._write_error_count} write errors in this run")
+                elif not self.collection.write_concern.acknowledged:
+                    logger.warning("Not saving ETags: unacknowledged writes cannot be confirmed")
+                else:
+                    self._save_etags('posts', etags)
+            
+            logger.info(f"Data load completed: {inserted_count} inserted, {updated_count} updated")
+            
             execution_time = time.time() - start_time
             logger.info(f"ETL pipeline completed successfully in {execution_time:.2f} seconds")
             return True
@@ -327,31 +1209,38 @@ class ETLConnector:
             return {}
         
         try:
-            total_records = self.collection.count_documents({})
+            # Compute the collection statistics in a single aggregation round trip
+            pipeline = [{'$facet': {
+                'summary': [
+                    {'$group': {
+                        '_id': None,
+                        'total_records': {'$sum': 1},
+                        'latest_batch_id': {'$max': '$etl_metadata.batch_id'},
+                        'avg_content_length': {'$avg': '$content_length'}
+                    }},
+                    # Ingestion timestamps live on the batch documents
+                    {'$lookup': {
+                        'from': self.batches_collection_name,
+                        'localField': 'latest_batch_id',
+                        'foreignField': '_id',
+                        'as': 'latest_batch'
+                    }}
+                ],
+                'users': [{'$group': {'_id': '$user_id'}}, {'$count': 'users_count'}]
+            }}]
+            result = next(self.collection.aggregate(pipeline), {})
+            
+            summary = (result.get('summary') or [{}])[0]
+            users = (result.get('users') or [{}])[0]
+            latest_batch = (summary.get('latest_batch') or [{}])[0]
             
             stats = {
-                'total_records': total_records,
-                'users_count': len(self.collection.distinct('user_id')),
-                'latest_ingestion': None,
-                'avg_content_length': 0
+                'total_records': summary.get('total_records', 0),
+                'users_count': users.get('users_count', 0),
+                'latest_ingestion': latest_batch.get('ingestion_timestamp'),
+                'avg_content_length': round(summary.get('avg_content_length') or 0, 2)
             }
             
-            # Only get additional stats if we have records
-            if total_records > 0:
-                # Get latest ingestion record
-                latest_record = self.collection.find_one(
-                    {}, sort=[('etl_metadata.ingestion_timestamp', -1)]
-                )
-                if latest_record:
-                    stats['latest_ingestion'] = latest_record.get('etl_metadata', {}).get('ingestion_timestamp')
-                
-                # Get average content length
-                avg_result = list(self.collection.aggregate([
-                    {'$group': {'_id': None, 'avg_length': {'$avg': '$content_length'}}}
-                ]))
-                if avg_result:
-                    stats['avg_content_length'] = round(avg_result[0].get('avg_length', 0), 2)
-            
             return stats
         except Exception as e:
             logger.error(f"Failed to get pipeline stats: {e}")
@@ -372,7 +1261,7 @@ def main():
             # Display stats (before closing connections)
             stats = connector.get_pipeline_stats()
             if stats:
-                logger.info(f"Pipeline Statistics: {json.dumps(stats, indent=2, default=str)}")
+                logger.info(f"Pipeline Statistics: {_dumps(stats)}")
             
             sys.exit(0)
         else: